@@ -6,8 +6,23 @@ class Settings(BaseSettings):
     MONGODB_DATABASE_NAME: str = "local-mongodb"
 
     AUTH_SECRET: str = "bad_secret"
+    # Private keys in PEM format by key id. When set, tokens are signed with these keys instead of
+    # AUTH_SECRET and the public keys are published in /.well-known/jwks.json.
+    AUTH_SIGNING_KEYS: dict[str, str] = {}
+    AUTH_SIGNING_KEY_ID: str | None = None
+    AUTH_SIGNING_ALGORITHM: str = "RS256"
     GOOGLE_OAUTH_CLIENT_ID: str | None = None
 
+    NOTE_CACHE_ENABLED: bool = False
+    NOTE_CACHE_MAX_BYTES: int = 100_000_000
+    NOTE_CACHE_MAX_BYTES_PER_USER: int = 1_000_000
+
+    # Each write waiting for its batch takes a threadpool thread, so the threadpool is grown by
+    # NOTE_WRITE_BATCH_MAX_SIZE when batching is enabled. Batch metrics are logged at INFO level.
+    NOTE_WRITE_BATCHING_ENABLED: bool = False
+    NOTE_WRITE_BATCH_MAX_SIZE: int = 100
+    NOTE_WRITE_BATCH_MAX_LATENCY_MS: int = 5
+
     model_config = SettingsConfigDict(env_file=".env")
 
 
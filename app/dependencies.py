@@ -1,16 +1,24 @@
 from datetime import datetime, timezone
+from functools import cache
 from typing import Annotated
 from uuid import UUID
 
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import JWTError
 from pydantic import ValidationError
 
 from .config import settings
-from .internal.constants import CREDENTIALS_EXCEPTION, DECODE_ALGORITHM
+from .internal.attachment_db_client import AttachmentDBClient, AttachmentGridFSClient
+from .internal.constants import CREDENTIALS_EXCEPTION
+from .internal.jwt_keys import decode_jwt
 from .internal.models import TokenPayload
-from .internal.note_db_client import NoteDBClient, NoteMongoDBClient
+from .internal.note_db_client import (
+    NoteBatchingMongoDBClient,
+    NoteCacheDBClient,
+    NoteDBClient,
+    NoteMongoDBClient,
+)
 from .internal.user_db_client import UserDBClient, UserMongoDBClient
 
 
@@ -18,10 +26,41 @@ def get_user_db_client() -> UserDBClient:
     return UserMongoDBClient()
 
 
-def get_note_db_client() -> NoteDBClient:
+@cache
+def get_note_batching_db_client() -> NoteBatchingMongoDBClient:
+    # Writes from all requests have to go through the same client to be batched together.
+    return NoteBatchingMongoDBClient(
+        max_batch_size=settings.NOTE_WRITE_BATCH_MAX_SIZE,
+        max_latency_ms=settings.NOTE_WRITE_BATCH_MAX_LATENCY_MS,
+    )
+
+
+def get_note_mongo_db_client() -> NoteMongoDBClient:
+    if settings.NOTE_WRITE_BATCHING_ENABLED:
+        return get_note_batching_db_client()
     return NoteMongoDBClient()
 
 
+@cache
+def get_note_cache_db_client() -> NoteCacheDBClient:
+    # The cache has to outlive a single request, so a single instance is shared by all requests.
+    return NoteCacheDBClient(
+        db_client=get_note_mongo_db_client(),
+        max_bytes=settings.NOTE_CACHE_MAX_BYTES,
+        max_bytes_per_user=settings.NOTE_CACHE_MAX_BYTES_PER_USER,
+    )
+
+
+def get_note_db_client() -> NoteDBClient:
+    if settings.NOTE_CACHE_ENABLED:
+        return get_note_cache_db_client()
+    return get_note_mongo_db_client()
+
+
+def get_attachment_db_client() -> AttachmentDBClient:
+    return AttachmentGridFSClient()
+
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
@@ -31,11 +70,7 @@ def get_current_user(
 ):
     # Check if the token can be converted correctly.
     try:
-        payload_dict = jwt.decode(
-            token,
-            settings.AUTH_SECRET,
-            algorithms=[DECODE_ALGORITHM],
-        )
+        payload_dict = decode_jwt(token)
         token_payload = TokenPayload(**payload_dict)
     except (ValidationError, JWTError):
         raise CREDENTIALS_EXCEPTION
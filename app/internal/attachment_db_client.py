@@ -0,0 +1,101 @@
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Iterator
+from uuid import uuid4
+
+from gridfs import GridFSBucket
+from gridfs.errors import NoFile
+from pydantic import UUID4
+from pymongo import MongoClient
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from .note_db_client import AttachmentModel
+
+
+class AttachmentDBClient(ABC):
+    @abstractmethod
+    async def save_attachment(
+        self,
+        user_id: UUID4,
+        note_id: UUID4,
+        filename: str,
+        content_type: str,
+        data: AsyncIterator[bytes],
+    ) -> AttachmentModel:
+        pass
+
+    @abstractmethod
+    def read_attachment(self, attachment_id: UUID4, start: int, end: int) -> Iterator[bytes]:
+        """Read the bytes from `start` up to, but not including, `end`."""
+        pass
+
+    @abstractmethod
+    def delete_attachment(self, attachment_id: UUID4):
+        """Delete the attachment. Deleting an attachment that does not exist does nothing."""
+        pass
+
+
+class AttachmentGridFSClient(AttachmentDBClient):
+    def __init__(self):
+        mongo_db_client = MongoClient(host=settings.MONGODB_URL, uuidRepresentation="standard")
+        mongo_db_database = mongo_db_client.get_database(settings.MONGODB_DATABASE_NAME)
+        self.bucket = GridFSBucket(mongo_db_database, bucket_name="attachment")
+
+    async def save_attachment(
+        self,
+        user_id: UUID4,
+        note_id: UUID4,
+        filename: str,
+        content_type: str,
+        data: AsyncIterator[bytes],
+    ) -> AttachmentModel:
+        attachment_id = uuid4()
+        upload = self.bucket.open_upload_stream_with_id(
+            attachment_id,
+            filename,
+            metadata={"user_id": user_id, "note_id": note_id, "content_type": content_type},
+        )
+
+        # The request body arrives in small pieces so it is collected up to one GridFS chunk at
+        # a time before handing it over to the blocking pymongo client.
+        buffer = bytearray()
+        try:
+            async for chunk in data:
+                buffer += chunk
+                if len(buffer) >= upload.chunk_size:
+                    await run_in_threadpool(upload.write, bytes(buffer))
+                    buffer.clear()
+            await run_in_threadpool(upload.write, bytes(buffer))
+            await run_in_threadpool(upload.close)
+        except BaseException:
+            await run_in_threadpool(upload.abort)
+            raise
+
+        return AttachmentModel(
+            id=attachment_id,
+            filename=filename,
+            content_type=content_type,
+            length=upload.length,
+        )
+
+    def read_attachment(self, attachment_id: UUID4, start: int, end: int) -> Iterator[bytes]:
+        download = self.bucket.open_download_stream(attachment_id)
+        download.seek(start)
+
+        def iterate_chunks():
+            with download:
+                remaining = end - start
+                while remaining > 0:
+                    chunk = download.read(min(remaining, download.chunk_size))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+
+        return iterate_chunks()
+
+    def delete_attachment(self, attachment_id: UUID4):
+        try:
+            self.bucket.delete(attachment_id)
+        except NoFile:
+            pass
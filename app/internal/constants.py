@@ -3,6 +3,9 @@ from fastapi import HTTPException, status
 DECODE_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Should stay well below the time a new signing key is published before it is used for signing.
+JWKS_CACHE_MAX_AGE_SECONDS = 300
+
 CREDENTIALS_EXCEPTION = HTTPException(
     status_code=status.HTTP_401_UNAUTHORIZED,
     detail="Could not validate credentials",
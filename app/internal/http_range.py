@@ -0,0 +1,39 @@
+from fastapi import HTTPException, status
+
+
+def parse_range_header(range_header: str | None, length: int) -> tuple[int, int] | None:
+    """Parse a single byte range into a `(start, end)` tuple where `end` is exclusive.
+
+    Returns None when the whole content should be sent. Multiple ranges are not supported and
+    the whole content is sent for them instead, as allowed by RFC 9110.
+    """
+    if range_header is None:
+        return None
+
+    unit, _, ranges = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in ranges:
+        return None
+
+    first, _, last = ranges.strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) + 1 if last else length
+            # A last position before the first one makes the range invalid, so it is ignored.
+            if last and end <= start:
+                return None
+        else:
+            # Suffix range, e.g. "bytes=-500" for the last 500 bytes.
+            start = max(length - int(last), 0)
+            end = length
+    except ValueError:
+        return None
+
+    if start < 0 or start >= length or end <= start:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{length}"},
+        )
+
+    return start, min(end, length)
@@ -0,0 +1,72 @@
+from functools import cache
+
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
+
+from ..config import settings
+from .constants import DECODE_ALGORITHM
+
+
+@cache
+def get_signing_keys() -> dict[str, Key]:
+    # Loaded in the app lifespan, so a misconfiguration stops the service from starting.
+    if (
+        settings.AUTH_SIGNING_KEY_ID
+        and settings.AUTH_SIGNING_KEY_ID not in settings.AUTH_SIGNING_KEYS
+    ):
+        raise ValueError(f"Unknown AUTH_SIGNING_KEY_ID: {settings.AUTH_SIGNING_KEY_ID}")
+
+    return {
+        key_id: jwk.construct(private_key, settings.AUTH_SIGNING_ALGORITHM)
+        for key_id, private_key in settings.AUTH_SIGNING_KEYS.items()
+    }
+
+
+@cache
+def get_verification_keys() -> dict[str, Key]:
+    return {key_id: key.public_key() for key_id, key in get_signing_keys().items()}
+
+
+@cache
+def get_jwks() -> dict:
+    return {
+        "keys": [
+            key.to_dict() | {"kid": key_id, "use": "sig"}
+            for key_id, key in get_verification_keys().items()
+        ]
+    }
+
+
+def encode_jwt(claims: dict) -> str:
+    signing_keys = get_signing_keys()
+
+    # Without configured signing keys fall back to signing with the shared secret.
+    if not signing_keys:
+        return jwt.encode(claims, settings.AUTH_SECRET, algorithm=DECODE_ALGORITHM)
+
+    # The first key is used to sign new tokens unless the key is set explicitly, so that newly
+    # added keys are only published in the JWKS until they are selected for signing.
+    key_id = settings.AUTH_SIGNING_KEY_ID or next(iter(signing_keys))
+    return jwt.encode(
+        claims,
+        signing_keys[key_id],
+        algorithm=settings.AUTH_SIGNING_ALGORITHM,
+        headers={"kid": key_id},
+    )
+
+
+def decode_jwt(token: str) -> dict:
+    verification_keys = get_verification_keys()
+
+    if not verification_keys:
+        return jwt.decode(token, settings.AUTH_SECRET, algorithms=[DECODE_ALGORITHM])
+
+    key_id = jwt.get_unverified_header(token).get("kid")
+    if not isinstance(key_id, str) or key_id not in verification_keys:
+        raise JWTError("Unknown signing key")
+
+    return jwt.decode(
+        token,
+        verification_keys[key_id],
+        algorithms=[settings.AUTH_SIGNING_ALGORITHM],
+    )
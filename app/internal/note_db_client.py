@@ -1,10 +1,20 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
+from threading import Lock
 
+from cachetools import LRUCache
 from pydantic import UUID4, BaseModel
-from pymongo import MongoClient
+from pymongo import InsertOne, MongoClient, UpdateOne
 
 from ..config import settings
+from .write_batcher import WriteBatcher
+
+
+class AttachmentModel(BaseModel):
+    id: UUID4
+    filename: str
+    content_type: str
+    length: int
 
 
 class NoteModel(BaseModel):
@@ -13,6 +23,8 @@ class NoteModel(BaseModel):
     title: str
     content: str
     last_updated: datetime
+    # Only references to the attachments, the data is stored with AttachmentDBClient.
+    attachments: list[AttachmentModel] = []
 
 
 class NoteDBClient(ABC):
@@ -33,7 +45,17 @@ class NoteDBClient(ABC):
         pass
 
     @abstractmethod
-    def delete_note(self, user_id: UUID4, note_id: UUID4):
+    def delete_note(self, user_id: UUID4, note_id: UUID4) -> NoteModel | None:
+        """Delete the note. Returns the deleted note, or None if there was no such note."""
+        pass
+
+    @abstractmethod
+    def add_attachment(self, user_id: UUID4, note_id: UUID4, attachment: AttachmentModel) -> bool:
+        """Add the attachment reference to the note. Returns False if there is no such note."""
+        pass
+
+    @abstractmethod
+    def remove_attachment(self, user_id: UUID4, note_id: UUID4, attachment_id: UUID4):
         pass
 
 
@@ -57,9 +79,160 @@ class NoteMongoDBClient(NoteDBClient):
     def update_note(self, user_id: UUID4, note_id: UUID4, note: NoteModel):
         self.note_connection.update_one(
             {"user_id": user_id, "id": note_id},
-            {"$set": note.model_dump()},
+            {"$set": note.model_dump(exclude={"attachments"})},
             upsert=False,
         )
 
-    def delete_note(self, user_id: UUID4, note_id: UUID4):
-        self.note_connection.delete_one({"user_id": user_id, "id": note_id})
+    def delete_note(self, user_id: UUID4, note_id: UUID4) -> NoteModel | None:
+        note = self.note_connection.find_one_and_delete({"user_id": user_id, "id": note_id})
+        return NoteModel(**note) if note else None
+
+    def add_attachment(self, user_id: UUID4, note_id: UUID4, attachment: AttachmentModel) -> bool:
+        result = self.note_connection.update_one(
+            {"user_id": user_id, "id": note_id},
+            {"$push": {"attachments": attachment.model_dump()}},
+        )
+        return result.matched_count == 1
+
+    def remove_attachment(self, user_id: UUID4, note_id: UUID4, attachment_id: UUID4):
+        self.note_connection.update_one(
+            {"user_id": user_id, "id": note_id},
+            {"$pull": {"attachments": {"id": attachment_id}}},
+        )
+
+
+class NoteBatchingMongoDBClient(NoteMongoDBClient):
+    """NoteMongoDBClient that groups concurrent note inserts and updates into bulk writes."""
+
+    def __init__(self, max_batch_size: int, max_latency_ms: int):
+        super().__init__()
+        self.write_batcher = WriteBatcher(
+            self.note_connection,
+            max_batch_size=max_batch_size,
+            max_latency_seconds=max_latency_ms / 1000,
+        )
+
+    def save_note(self, note: NoteModel):
+        self.write_batcher.write(InsertOne(note.model_dump()))
+
+    def update_note(self, user_id: UUID4, note_id: UUID4, note: NoteModel):
+        self.write_batcher.write(
+            UpdateOne(
+                {"user_id": user_id, "id": note_id},
+                {"$set": note.model_dump(exclude={"attachments"})},
+                upsert=False,
+            )
+        )
+
+
+# Rough memory used by a cached note on top of its JSON size, e.g. the model and its fields.
+NOTE_CACHE_ENTRY_OVERHEAD_BYTES = 1024
+
+
+def get_note_cache_size(note: NoteModel) -> int:
+    return len(note.model_dump_json()) + NOTE_CACHE_ENTRY_OVERHEAD_BYTES
+
+
+class NoteCacheDBClient(NoteDBClient):
+    """Read-through LRU cache for single note reads, wrapping another NoteDBClient.
+
+    Every user gets their own LRU cache limited to `max_bytes_per_user` bytes, and the least
+    recently used users are evicted to keep all the caches within `max_bytes`. Writes go to the
+    wrapped client first and then update or evict the cached entry.
+    """
+
+    def __init__(self, db_client: NoteDBClient, max_bytes: int, max_bytes_per_user: int):
+        self.db_client = db_client
+        self.max_bytes_per_user = min(max_bytes_per_user, max_bytes)
+        self._user_caches: LRUCache[UUID4, LRUCache[UUID4, NoteModel]] = LRUCache(
+            max_bytes, getsizeof=lambda user_cache: user_cache.currsize
+        )
+        self._lock = Lock()
+        # Reader count and write generation by (user_id, note_id) for the notes being read from the
+        # wrapped client. The generation is bumped on writes so that a read which raced with a
+        # write of the same note does not cache stale data.
+        self._pending_reads: dict[tuple[UUID4, UUID4], list[int]] = {}
+
+    def _resize_user_cache(self, user_id: UUID4, user_cache: LRUCache[UUID4, NoteModel]):
+        # The size of a user's cache is only computed when it is inserted, so it is inserted again
+        # after every change. Empty caches are dropped.
+        self._user_caches.pop(user_id, None)
+        if user_cache:
+            self._user_caches[user_id] = user_cache
+
+    def _cache_note(self, note: NoteModel):
+        if get_note_cache_size(note) > self.max_bytes_per_user:
+            return
+        user_cache = self._user_caches.get(note.user_id)
+        if user_cache is None:
+            user_cache = LRUCache(self.max_bytes_per_user, getsizeof=get_note_cache_size)
+        user_cache[note.id] = note
+        self._resize_user_cache(note.user_id, user_cache)
+
+    def _evict_note(self, user_id: UUID4, note_id: UUID4):
+        if pending_read := self._pending_reads.get((user_id, note_id)):
+            pending_read[1] += 1
+        if user_cache := self._user_caches.get(user_id):
+            user_cache.pop(note_id, None)
+            self._resize_user_cache(user_id, user_cache)
+
+    def get_notes(self, user_id: UUID4) -> list[NoteModel]:
+        return self.db_client.get_notes(user_id=user_id)
+
+    def get_note(self, user_id: UUID4, note_id: UUID4) -> NoteModel | None:
+        with self._lock:
+            if user_cache := self._user_caches.get(user_id):
+                if (note := user_cache.get(note_id)) is not None:
+                    return note
+            pending_read = self._pending_reads.setdefault((user_id, note_id), [0, 0])
+            pending_read[0] += 1
+            write_generation = pending_read[1]
+
+        note = None
+        try:
+            note = self.db_client.get_note(user_id=user_id, note_id=note_id)
+        finally:
+            with self._lock:
+                if note is not None and write_generation == pending_read[1]:
+                    self._cache_note(note)
+                pending_read[0] -= 1
+                if pending_read[0] == 0:
+                    del self._pending_reads[(user_id, note_id)]
+        return note
+
+    def save_note(self, note: NoteModel):
+        result = self.db_client.save_note(note=note)
+        with self._lock:
+            self._evict_note(note.user_id, note.id)
+            self._cache_note(note)
+        return result
+
+    def update_note(self, user_id: UUID4, note_id: UUID4, note: NoteModel):
+        # The wrapped update does not upsert, so the note is evicted rather than cached as it may
+        # not exist in the database.
+        result = self.db_client.update_note(user_id=user_id, note_id=note_id, note=note)
+        with self._lock:
+            self._evict_note(user_id, note_id)
+        return result
+
+    def delete_note(self, user_id: UUID4, note_id: UUID4) -> NoteModel | None:
+        result = self.db_client.delete_note(user_id=user_id, note_id=note_id)
+        with self._lock:
+            self._evict_note(user_id, note_id)
+        return result
+
+    def add_attachment(self, user_id: UUID4, note_id: UUID4, attachment: AttachmentModel) -> bool:
+        result = self.db_client.add_attachment(
+            user_id=user_id, note_id=note_id, attachment=attachment
+        )
+        with self._lock:
+            self._evict_note(user_id, note_id)
+        return result
+
+    def remove_attachment(self, user_id: UUID4, note_id: UUID4, attachment_id: UUID4):
+        result = self.db_client.remove_attachment(
+            user_id=user_id, note_id=note_id, attachment_id=attachment_id
+        )
+        with self._lock:
+            self._evict_note(user_id, note_id)
+        return result
@@ -5,12 +5,12 @@ from uuid import uuid4
 from fastapi import Form, HTTPException, status
 from google.auth.transport import requests
 from google.oauth2 import id_token
-from jose import jwt
 from passlib.context import CryptContext
 from pydantic import UUID4
 
 from ..config import settings
-from .constants import ACCESS_TOKEN_EXPIRE_MINUTES, CREDENTIALS_EXCEPTION, DECODE_ALGORITHM
+from .constants import ACCESS_TOKEN_EXPIRE_MINUTES, CREDENTIALS_EXCEPTION
+from .jwt_keys import encode_jwt
 from .models import TokenPayload
 from .user_db_client import UserDBClient, UserModel
 
@@ -20,11 +20,7 @@ def create_access_token(user_id: UUID4):
         sub=user_id.hex,
         expires=datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
     )
-    encoded_jwt = jwt.encode(
-        token_data.model_dump(mode="json"),
-        settings.AUTH_SECRET,
-        algorithm=DECODE_ALGORITHM,
-    )
+    encoded_jwt = encode_jwt(token_data.model_dump(mode="json"))
     return encoded_jwt
 
 
@@ -0,0 +1,138 @@
+import logging
+import time
+from concurrent.futures import Future
+from queue import Empty, Queue
+from threading import Thread
+
+from pydantic import BaseModel
+from pymongo import InsertOne, UpdateOne
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError, DuplicateKeyError, WriteConcernError, WriteError
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR_CODE = 11000
+
+
+class WriteBatchMetrics(BaseModel):
+    batch_count: int = 0
+    operation_count: int = 0
+    full_batch_count: int = 0
+
+    def average_batch_fill(self, max_batch_size: int) -> float:
+        if self.batch_count == 0:
+            return 0.0
+        return self.operation_count / (self.batch_count * max_batch_size)
+
+
+class WriteBatcher:
+    """Group concurrent writes to a collection into a single `bulk_write`.
+
+    Writes are collected by a background thread for at most `max_latency_seconds` after the
+    first write of a batch, or until `max_batch_size` writes are waiting. The calling thread is
+    blocked until its own write has been flushed and gets the error of its own write, if any.
+    The batch metrics are logged every `metrics_log_interval` batches.
+    """
+
+    def __init__(
+        self,
+        collection: Collection,
+        max_batch_size: int,
+        max_latency_seconds: float,
+        metrics_log_interval: int = 1000,
+    ):
+        self.collection = collection
+        self.max_batch_size = max_batch_size
+        self.max_latency_seconds = max_latency_seconds
+        self.metrics_log_interval = metrics_log_interval
+        self.metrics = WriteBatchMetrics()
+        self._queue: Queue[tuple[InsertOne | UpdateOne, Future]] = Queue()
+        Thread(target=self._run, name="write-batcher", daemon=True).start()
+
+    def write(self, operation: InsertOne | UpdateOne):
+        future = Future()
+        self._queue.put((operation, future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_latency_seconds
+            while len(batch) < self.max_batch_size:
+                # After the deadline the writes that are already waiting are still added.
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except Empty:
+                    break
+
+            # Whatever goes wrong, no caller may be left waiting and the thread has to keep
+            # serving the following batches.
+            try:
+                self._flush(batch)
+            except BaseException as e:
+                logger.exception("Flushing a write batch failed")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+            self._record_metrics(len(batch))
+
+    def _record_metrics(self, batch_size: int):
+        self.metrics.batch_count += 1
+        self.metrics.operation_count += batch_size
+        if batch_size == self.max_batch_size:
+            self.metrics.full_batch_count += 1
+
+        if self.metrics.batch_count % self.metrics_log_interval == 0:
+            logger.info(
+                "Write batches: %d, operations: %d, full batches: %d, average batch fill: %.2f",
+                self.metrics.batch_count,
+                self.metrics.operation_count,
+                self.metrics.full_batch_count,
+                self.metrics.average_batch_fill(self.max_batch_size),
+            )
+
+    def _flush(self, batch: list[tuple[InsertOne | UpdateOne, Future]]):
+        errors: dict[int, Exception] = {}
+        try:
+            # Unordered so that a failing write does not prevent the rest of the batch.
+            self.collection.bulk_write([operation for operation, _ in batch], ordered=False)
+        except BulkWriteError as e:
+            try:
+                errors = self._get_write_errors(e, len(batch))
+            except (KeyError, TypeError):
+                errors = {index: e for index in range(len(batch))}
+        except Exception as e:
+            errors = {index: e for index in range(len(batch))}
+
+        for index, (_, future) in enumerate(batch):
+            if index in errors:
+                future.set_exception(errors[index])
+            else:
+                future.set_result(None)
+
+    def _get_write_errors(self, error: BulkWriteError, batch_size: int) -> dict[int, Exception]:
+        errors: dict[int, Exception] = {}
+        for write_error in error.details.get("writeErrors", []):
+            error_class = (
+                DuplicateKeyError
+                if write_error.get("code") == DUPLICATE_KEY_ERROR_CODE
+                else WriteError
+            )
+            errors[write_error["index"]] = error_class(
+                write_error.get("errmsg", ""), write_error.get("code"), write_error
+            )
+
+        if write_concern_errors := error.details.get("writeConcernErrors"):
+            write_concern_error = write_concern_errors[0]
+            for index in range(batch_size):
+                errors.setdefault(
+                    index,
+                    WriteConcernError(
+                        write_concern_error.get("errmsg", ""),
+                        write_concern_error.get("code"),
+                        write_concern_error,
+                    ),
+                )
+
+        return errors
@@ -1,9 +1,30 @@
+from contextlib import asynccontextmanager
+
+from anyio import to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .routers import auth, notes
+from .config import settings
+from .internal.jwt_keys import get_jwks
+from .routers import auth, notes, well_known
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the signing and verification keys before serving the first request.
+    get_jwks()
+
+    if settings.NOTE_WRITE_BATCHING_ENABLED:
+        # The sync endpoints run in the threadpool and a batched write blocks its thread until the
+        # batch is flushed. The pool needs room for a full batch on top of the other requests.
+        to_thread.current_default_thread_limiter().total_tokens += (
+            settings.NOTE_WRITE_BATCH_MAX_SIZE
+        )
+
+    yield
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:3000",
@@ -19,3 +40,4 @@ app.add_middleware(
 
 app.include_router(auth.router)
 app.include_router(notes.router)
+app.include_router(well_known.router)
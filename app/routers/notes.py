@@ -1,12 +1,17 @@
 from datetime import datetime, timezone
 from typing import Annotated
+from urllib.parse import quote
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from pydantic import UUID4, BaseModel
+from starlette.concurrency import run_in_threadpool
 
-from ..dependencies import get_current_user, get_note_db_client
-from ..internal.note_db_client import NoteDBClient, NoteModel
+from ..dependencies import get_attachment_db_client, get_current_user, get_note_db_client
+from ..internal.attachment_db_client import AttachmentDBClient
+from ..internal.http_range import parse_range_header
+from ..internal.note_db_client import AttachmentModel, NoteDBClient, NoteModel
 from ..internal.user_management import UserModel
 
 router = APIRouter(
@@ -20,6 +25,19 @@ class NoteBody(BaseModel):
     content: str
 
 
+NOTE_NOT_FOUND_EXCEPTION = HTTPException(
+    status_code=status.HTTP_404_NOT_FOUND,
+    detail="No note found for id",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+ATTACHMENT_NOT_FOUND_EXCEPTION = HTTPException(
+    status_code=status.HTTP_404_NOT_FOUND,
+    detail="No attachment found for id",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+
 @router.get("/", response_model=list[NoteModel])
 def get_notes(
     user: Annotated[UserModel, Depends(get_current_user)],
@@ -37,11 +55,7 @@ def get_note(
     note = note_db_client.get_note(user_id=user.id, note_id=note_id)
 
     if note is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="No note found for id",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise NOTE_NOT_FOUND_EXCEPTION
 
     return note
 
@@ -68,6 +82,7 @@ def update_note(
     body: NoteBody,
     note_db_client: Annotated[NoteDBClient, Depends(get_note_db_client)],
 ):
+    # The note's attachments are not part of the body and are left unchanged by the update.
     note = NoteModel(
         id=note_id,
         user_id=user.id,
@@ -82,5 +97,118 @@ def delete_note(
     note_id: UUID4,
     user: Annotated[UserModel, Depends(get_current_user)],
     note_db_client: Annotated[NoteDBClient, Depends(get_note_db_client)],
+    attachment_db_client: Annotated[AttachmentDBClient, Depends(get_attachment_db_client)],
+):
+    # The note is deleted first, so that a failure leaves orphaned files rather than a note
+    # referencing deleted files. The deleted note also has every attachment added before it.
+    if note := note_db_client.delete_note(user_id=user.id, note_id=note_id):
+        for attachment in note.attachments:
+            attachment_db_client.delete_attachment(attachment_id=attachment.id)
+
+
+# <------------- ATTACHMENTS ------------->
+
+
+@router.post("/{note_id}/attachment", response_model=AttachmentModel)
+async def save_attachment(
+    note_id: UUID4,
+    filename: str,
+    request: Request,
+    user: Annotated[UserModel, Depends(get_current_user)],
+    note_db_client: Annotated[NoteDBClient, Depends(get_note_db_client)],
+    attachment_db_client: Annotated[AttachmentDBClient, Depends(get_attachment_db_client)],
 ):
-    return note_db_client.delete_note(user_id=user.id, note_id=note_id)
+    # The body is read as a raw stream so that the file is never held in memory or spooled to a
+    # temporary file as a whole. The database clients block, so they are run in the threadpool.
+    note = await run_in_threadpool(note_db_client.get_note, user_id=user.id, note_id=note_id)
+    if note is None:
+        raise NOTE_NOT_FOUND_EXCEPTION
+
+    attachment = await attachment_db_client.save_attachment(
+        user_id=user.id,
+        note_id=note_id,
+        filename=filename,
+        content_type=request.headers.get("content-type", "application/octet-stream"),
+        data=request.stream(),
+    )
+
+    # Remove the stored file if the note could not reference it, e.g. it was deleted meanwhile.
+    # A failed add may still have been applied, so the reference is removed before the file.
+    try:
+        added = await run_in_threadpool(
+            note_db_client.add_attachment, user_id=user.id, note_id=note_id, attachment=attachment
+        )
+    except BaseException:
+        await run_in_threadpool(
+            note_db_client.remove_attachment,
+            user_id=user.id,
+            note_id=note_id,
+            attachment_id=attachment.id,
+        )
+        await run_in_threadpool(attachment_db_client.delete_attachment, attachment_id=attachment.id)
+        raise
+    if not added:
+        await run_in_threadpool(attachment_db_client.delete_attachment, attachment_id=attachment.id)
+        raise NOTE_NOT_FOUND_EXCEPTION
+
+    return attachment
+
+
+def get_note_attachment(note: NoteModel | None, attachment_id: UUID4) -> AttachmentModel:
+    if note is None:
+        raise NOTE_NOT_FOUND_EXCEPTION
+
+    attachment = next((a for a in note.attachments if a.id == attachment_id), None)
+    if attachment is None:
+        raise ATTACHMENT_NOT_FOUND_EXCEPTION
+
+    return attachment
+
+
+@router.get("/{note_id}/attachment/{attachment_id}", response_class=StreamingResponse)
+def get_attachment(
+    note_id: UUID4,
+    attachment_id: UUID4,
+    user: Annotated[UserModel, Depends(get_current_user)],
+    note_db_client: Annotated[NoteDBClient, Depends(get_note_db_client)],
+    attachment_db_client: Annotated[AttachmentDBClient, Depends(get_attachment_db_client)],
+    range_header: Annotated[str | None, Header(alias="Range")] = None,
+):
+    note = note_db_client.get_note(user_id=user.id, note_id=note_id)
+    attachment = get_note_attachment(note, attachment_id)
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(attachment.filename)}",
+    }
+    byte_range = parse_range_header(range_header, attachment.length)
+    if byte_range is None:
+        start, end = 0, attachment.length
+        status_code = status.HTTP_200_OK
+    else:
+        start, end = byte_range
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{attachment.length}"
+    headers["Content-Length"] = str(end - start)
+
+    return StreamingResponse(
+        attachment_db_client.read_attachment(attachment_id=attachment.id, start=start, end=end),
+        status_code=status_code,
+        media_type=attachment.content_type,
+        headers=headers,
+    )
+
+
+@router.delete("/{note_id}/attachment/{attachment_id}", response_model=None)
+def delete_attachment(
+    note_id: UUID4,
+    attachment_id: UUID4,
+    user: Annotated[UserModel, Depends(get_current_user)],
+    note_db_client: Annotated[NoteDBClient, Depends(get_note_db_client)],
+    attachment_db_client: Annotated[AttachmentDBClient, Depends(get_attachment_db_client)],
+):
+    note = note_db_client.get_note(user_id=user.id, note_id=note_id)
+    attachment = get_note_attachment(note, attachment_id)
+
+    note_db_client.remove_attachment(user_id=user.id, note_id=note_id, attachment_id=attachment.id)
+    return attachment_db_client.delete_attachment(attachment_id=attachment.id)
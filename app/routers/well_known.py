@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Response
+
+from ..internal.constants import JWKS_CACHE_MAX_AGE_SECONDS
+from ..internal.jwt_keys import get_jwks
+
+router = APIRouter(
+    prefix="/.well-known",
+    tags=["well-known"],
+)
+
+
+@router.get("/jwks.json")
+async def jwks(response: Response) -> dict:
+    response.headers["Cache-Control"] = f"public, max-age={JWKS_CACHE_MAX_AGE_SECONDS}"
+    return get_jwks()
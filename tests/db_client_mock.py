@@ -1,6 +1,10 @@
+from collections.abc import AsyncIterator, Iterator
+from uuid import uuid4
+
 from pydantic import UUID4
 
-from app.internal.note_db_client import NoteDBClient, NoteModel
+from app.internal.attachment_db_client import AttachmentDBClient
+from app.internal.note_db_client import AttachmentModel, NoteDBClient, NoteModel
 from app.internal.user_db_client import UserDBClient, UserModel
 
 
@@ -27,12 +31,30 @@ class NoteTestBClient(NoteDBClient):
     def update_note(self, user_id: UUID4, note_id: UUID4, note: NoteModel):
         note_index = self._get_note_index(user_id, note_id)
         if note_index is not None:
-            self.data[note_index] = note
+            attachments = self.data[note_index].attachments
+            self.data[note_index] = note.model_copy(update={"attachments": attachments})
+
+    def delete_note(self, user_id: UUID4, note_id: UUID4) -> NoteModel | None:
+        note_index = self._get_note_index(user_id, note_id)
+        return self.data.pop(note_index) if note_index is not None else None
 
-    def delete_note(self, user_id: UUID4, note_id: UUID4):
+    def add_attachment(self, user_id: UUID4, note_id: UUID4, attachment: AttachmentModel) -> bool:
+        note_index = self._get_note_index(user_id, note_id)
+        if note_index is None:
+            return False
+        note = self.data[note_index]
+        self.data[note_index] = note.model_copy(
+            update={"attachments": [*note.attachments, attachment]}
+        )
+        return True
+
+    def remove_attachment(self, user_id: UUID4, note_id: UUID4, attachment_id: UUID4):
         note_index = self._get_note_index(user_id, note_id)
         if note_index is not None:
-            self.data.pop(note_index)
+            note = self.data[note_index]
+            self.data[note_index] = note.model_copy(
+                update={"attachments": [a for a in note.attachments if a.id != attachment_id]}
+            )
 
 
 class UserTestDBClient(UserDBClient):
@@ -53,3 +75,31 @@ class UserTestDBClient(UserDBClient):
 
     def save_user(self, user: UserModel):
         self.data.append(user)
+
+
+class AttachmentTestDBClient(AttachmentDBClient):
+    def __init__(self):
+        self.data: dict[UUID4, bytes] = {}
+
+    async def save_attachment(
+        self,
+        user_id: UUID4,
+        note_id: UUID4,
+        filename: str,
+        content_type: str,
+        data: AsyncIterator[bytes],
+    ) -> AttachmentModel:
+        attachment_id = uuid4()
+        self.data[attachment_id] = b"".join([chunk async for chunk in data])
+        return AttachmentModel(
+            id=attachment_id,
+            filename=filename,
+            content_type=content_type,
+            length=len(self.data[attachment_id]),
+        )
+
+    def read_attachment(self, attachment_id: UUID4, start: int, end: int) -> Iterator[bytes]:
+        return iter([self.data[attachment_id][start:end]])
+
+    def delete_attachment(self, attachment_id: UUID4):
+        self.data.pop(attachment_id, None)
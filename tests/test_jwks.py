@@ -0,0 +1,95 @@
+import pytest
+import rsa
+from fastapi.testclient import TestClient
+from jose import jwt
+
+from app.config import settings
+from app.dependencies import get_note_db_client, get_user_db_client
+from app.internal.jwt_keys import get_jwks, get_signing_keys, get_verification_keys
+from app.main import app
+from tests.db_client_mock import NoteTestBClient, UserTestDBClient
+
+client = TestClient(app)
+
+
+def clear_key_caches():
+    get_signing_keys.cache_clear()
+    get_verification_keys.cache_clear()
+    get_jwks.cache_clear()
+
+
+def create_private_key() -> str:
+    _, private_key = rsa.newkeys(1024)
+    return private_key.save_pkcs1().decode()
+
+
+@pytest.fixture
+def signing_keys(monkeypatch):
+    keys = {"old-key": create_private_key(), "new-key": create_private_key()}
+    monkeypatch.setattr(settings, "AUTH_SIGNING_KEYS", keys)
+    clear_key_caches()
+    yield keys
+    clear_key_caches()
+
+
+def register_user() -> str:
+    user_test_db = UserTestDBClient()
+    note_test_db = NoteTestBClient()
+    app.dependency_overrides[get_user_db_client] = lambda: user_test_db
+    app.dependency_overrides[get_note_db_client] = lambda: note_test_db
+
+    response = client.post(
+        "/auth/register",
+        data={"username": "test@email.com", "password": "password"},
+    )
+    assert response.status_code == 200
+    return response.json()["access_token"]
+
+
+def test_jwks_without_signing_keys():
+    response = client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    assert response.json() == {"keys": []}
+
+
+def test_jwks_and_token_signing(signing_keys):
+    response = client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    assert "max-age" in response.headers["Cache-Control"]
+    jwks = response.json()
+    assert [key["kid"] for key in jwks["keys"]] == ["old-key", "new-key"]
+
+    # New tokens are signed with the first key and can be verified with the published key set.
+    jwt_token = register_user()
+    assert jwt.get_unverified_header(jwt_token)["kid"] == "old-key"
+    assert jwt.decode(jwt_token, jwks, algorithms=["RS256"])["sub"]
+
+    # Tokens signed with the shared secret are no longer accepted.
+    hs256_token = jwt.encode(jwt.get_unverified_claims(jwt_token), settings.AUTH_SECRET)
+    for token, status_code in [(jwt_token, 200), (hs256_token, 401)]:
+        response = client.get("/note", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == status_code
+
+
+def test_signing_key_rotation(signing_keys, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_SIGNING_KEY_ID", "old-key")
+    jwt_token = register_user()
+    assert jwt.get_unverified_header(jwt_token)["kid"] == "old-key"
+
+    # Tokens signed with the previous key stay valid while the key is still configured.
+    monkeypatch.setattr(settings, "AUTH_SIGNING_KEY_ID", "new-key")
+    response = client.get("/note", headers={"Authorization": f"Bearer {jwt_token}"})
+    assert response.status_code == 200
+
+    # Once the previous key is removed its tokens are rejected.
+    monkeypatch.setattr(settings, "AUTH_SIGNING_KEYS", {"new-key": signing_keys["new-key"]})
+    clear_key_caches()
+    response = client.get("/note", headers={"Authorization": f"Bearer {jwt_token}"})
+    assert response.status_code == 401
+
+
+def test_unknown_signing_key_id(signing_keys, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_SIGNING_KEY_ID", "missing-key")
+    with pytest.raises(ValueError):
+        with TestClient(app):
+            pass
@@ -0,0 +1,151 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from pydantic import UUID4
+
+from app.internal.note_db_client import (
+    AttachmentModel,
+    NoteCacheDBClient,
+    NoteModel,
+    get_note_cache_size,
+)
+from tests.db_client_mock import NoteTestBClient
+
+
+class CountingNoteTestDBClient(NoteTestBClient):
+    def __init__(self):
+        super().__init__()
+        self.get_note_calls = 0
+        self.on_get_note = lambda: None
+
+    def get_note(self, user_id: UUID4, note_id: UUID4) -> NoteModel | None:
+        self.get_note_calls += 1
+        self.on_get_note()
+        return super().get_note(user_id=user_id, note_id=note_id)
+
+
+def create_note(user_id: UUID4, content: str = "Note content") -> NoteModel:
+    return NoteModel(
+        id=uuid4(),
+        user_id=user_id,
+        title="Title",
+        content=content,
+        last_updated=datetime.now(timezone.utc),
+    )
+
+
+def test_get_note_is_cached():
+    test_db = CountingNoteTestDBClient()
+    cache_db = NoteCacheDBClient(db_client=test_db, max_bytes=100_000, max_bytes_per_user=10_000)
+    note = create_note(uuid4())
+    test_db.save_note(note)
+
+    assert cache_db.get_note(user_id=note.user_id, note_id=note.id) == note
+    assert cache_db.get_note(user_id=note.user_id, note_id=note.id) == note
+    assert test_db.get_note_calls == 1
+
+    # Missing notes are not cached.
+    assert cache_db.get_note(user_id=note.user_id, note_id=uuid4()) is None
+    assert test_db.get_note_calls == 2
+
+
+def test_writes_update_and_evict_cache():
+    test_db = CountingNoteTestDBClient()
+    cache_db = NoteCacheDBClient(db_client=test_db, max_bytes=100_000, max_bytes_per_user=10_000)
+    note = create_note(uuid4())
+
+    # Saved notes are written through to the cache.
+    cache_db.save_note(note)
+    assert cache_db.get_note(user_id=note.user_id, note_id=note.id) == note
+    assert test_db.get_note_calls == 0
+
+    # Updated notes are evicted and read again from the wrapped client.
+    updated_note = note.model_copy(update={"title": "New title"})
+    cache_db.update_note(user_id=note.user_id, note_id=note.id, note=updated_note)
+    assert cache_db.get_note(user_id=note.user_id, note_id=note.id).title == "New title"
+    assert test_db.get_note_calls == 1
+
+    cache_db.delete_note(user_id=note.user_id, note_id=note.id)
+    assert cache_db.get_note(user_id=note.user_id, note_id=note.id) is None
+
+
+def test_cache_is_limited_per_user():
+    test_db = CountingNoteTestDBClient()
+    user_id = uuid4()
+    notes = [create_note(user_id) for _ in range(5)]
+    note_size = get_note_cache_size(notes[0])
+    cache_db = NoteCacheDBClient(
+        db_client=test_db, max_bytes=6 * note_size, max_bytes_per_user=4 * note_size
+    )
+    for note in notes:
+        cache_db.save_note(note)
+
+    # The oldest notes have been evicted to keep the user's cache within its size limit.
+    assert cache_db.get_note(user_id=user_id, note_id=notes[-1].id) is not None
+    assert test_db.get_note_calls == 0
+    assert cache_db.get_note(user_id=user_id, note_id=notes[0].id) is not None
+    assert test_db.get_note_calls == 1
+
+    # Notes larger than the user's limit are never cached.
+    large_note = create_note(user_id, content="x" * 4 * note_size)
+    cache_db.save_note(large_note)
+    cache_db.get_note(user_id=user_id, note_id=large_note.id)
+    assert test_db.get_note_calls == 2
+
+
+def test_cache_is_limited_in_total():
+    test_db = CountingNoteTestDBClient()
+    user_id, other_user_id = uuid4(), uuid4()
+    notes = [create_note(user_id) for _ in range(3)]
+    note_size = get_note_cache_size(notes[0])
+    cache_db = NoteCacheDBClient(
+        db_client=test_db, max_bytes=4 * note_size, max_bytes_per_user=3 * note_size
+    )
+    for note in notes:
+        cache_db.save_note(note)
+
+    # Caching more notes than fit in total evicts the least recently used user's cache.
+    other_notes = [create_note(other_user_id) for _ in range(2)]
+    for note in other_notes:
+        cache_db.save_note(note)
+    cache_db.get_note(user_id=other_user_id, note_id=other_notes[0].id)
+    assert test_db.get_note_calls == 0
+    cache_db.get_note(user_id=user_id, note_id=notes[-1].id)
+    assert test_db.get_note_calls == 1
+
+    # Attachment references count towards the size of a note.
+    note_with_attachments = notes[0].model_copy(
+        update={
+            "attachments": [
+                AttachmentModel(
+                    id=uuid4(), filename="data.txt", content_type="text/plain", length=1
+                )
+                for _ in range(100)
+            ]
+        }
+    )
+    assert get_note_cache_size(note_with_attachments) > 5 * note_size
+
+
+def test_read_racing_with_write_is_not_cached():
+    test_db = CountingNoteTestDBClient()
+    cache_db = NoteCacheDBClient(db_client=test_db, max_bytes=100_000, max_bytes_per_user=10_000)
+    user_id = uuid4()
+    note, other_note = create_note(user_id), create_note(user_id)
+    test_db.save_note(note)
+    test_db.save_note(other_note)
+
+    # Writes to other notes while reading do not prevent caching the read note.
+    test_db.on_get_note = lambda: cache_db.delete_note(user_id=user_id, note_id=other_note.id)
+    cache_db.get_note(user_id=user_id, note_id=note.id)
+    cache_db.get_note(user_id=user_id, note_id=note.id)
+    assert test_db.get_note_calls == 1
+
+    # A write to the same note while reading it may have made the read stale.
+    cache_db.delete_note(user_id=user_id, note_id=note.id)
+    test_db.save_note(note)
+    test_db.on_get_note = lambda: cache_db.update_note(user_id=user_id, note_id=note.id, note=note)
+    assert cache_db.get_note(user_id=user_id, note_id=note.id) == note
+    test_db.on_get_note = lambda: None
+    assert cache_db.get_note(user_id=user_id, note_id=note.id) == note
+    assert test_db.get_note_calls == 3
@@ -1,8 +1,13 @@
+from uuid import uuid4
+
+import pytest
 from fastapi.testclient import TestClient
+from gridfs.errors import NoFile
 
-from app.dependencies import get_note_db_client, get_user_db_client
+from app.dependencies import get_attachment_db_client, get_note_db_client, get_user_db_client
+from app.internal.attachment_db_client import AttachmentGridFSClient
 from app.main import app
-from tests.db_client_mock import NoteTestBClient, UserTestDBClient
+from tests.db_client_mock import AttachmentTestDBClient, NoteTestBClient, UserTestDBClient
 
 client = TestClient(app)
 
@@ -113,3 +118,193 @@ def test_end_to_end():
     assert response.status_code == 200
     response_data = response.json()
     assert len(response_data) == 0
+
+
+def test_attachments():
+    user_test_db = UserTestDBClient()
+    note_test_db = NoteTestBClient()
+    attachment_test_db = AttachmentTestDBClient()
+    app.dependency_overrides[get_user_db_client] = lambda: user_test_db
+    app.dependency_overrides[get_note_db_client] = lambda: note_test_db
+    app.dependency_overrides[get_attachment_db_client] = lambda: attachment_test_db
+
+    register_response = client.post(
+        "/auth/register",
+        data={"username": "test@email.com", "password": "password"},
+    )
+    headers = {"Authorization": f"Bearer {register_response.json()['access_token']}"}
+    client.post("/note", json=NOTE_JSON, headers=headers)
+    note_id = client.get("/note", headers=headers).json()[0]["id"]
+
+    # Upload an attachment as raw request body
+    response = client.post(
+        f"/note/{note_id}/attachment",
+        params={"filename": "data.txt"},
+        content=b"0123456789",
+        headers=headers | {"Content-Type": "text/plain"},
+    )
+    assert response.status_code == 200
+    attachment_id = response.json()["id"]
+    assert response.json()["length"] == 10
+
+    # The note only holds a reference to the attachment, also after updating the note
+    client.put(f"/note/{note_id}", json=NOTE_JSON | {"title": "New title"}, headers=headers)
+    response = client.get(f"/note/{note_id}", headers=headers)
+    assert response.json()["attachments"] == [
+        {"id": attachment_id, "filename": "data.txt", "content_type": "text/plain", "length": 10}
+    ]
+
+    # Download the whole attachment
+    response = client.get(f"/note/{note_id}/attachment/{attachment_id}", headers=headers)
+    assert response.status_code == 200
+    assert response.content == b"0123456789"
+    assert response.headers["Content-Type"].startswith("text/plain")
+
+    # Download parts of the attachment with range requests
+    for range_header, content_range, content in [
+        ("bytes=2-4", "bytes 2-4/10", b"234"),
+        ("bytes=7-", "bytes 7-9/10", b"789"),
+        ("bytes=-2", "bytes 8-9/10", b"89"),
+        ("bytes=5-100", "bytes 5-9/10", b"56789"),
+    ]:
+        response = client.get(
+            f"/note/{note_id}/attachment/{attachment_id}",
+            headers=headers | {"Range": range_header},
+        )
+        assert response.status_code == 206
+        assert response.headers["Content-Range"] == content_range
+        assert response.content == content
+
+    # Invalid ranges are ignored and the whole attachment is sent
+    response = client.get(
+        f"/note/{note_id}/attachment/{attachment_id}",
+        headers=headers | {"Range": "bytes=5-3"},
+    )
+    assert response.status_code == 200
+    assert response.content == b"0123456789"
+
+    response = client.get(
+        f"/note/{note_id}/attachment/{attachment_id}",
+        headers=headers | {"Range": "bytes=10-"},
+    )
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == "bytes */10"
+
+    # Delete the attachment
+    response = client.delete(f"/note/{note_id}/attachment/{attachment_id}", headers=headers)
+    assert response.status_code == 200
+    assert attachment_test_db.data == {}
+    response = client.get(f"/note/{note_id}/attachment/{attachment_id}", headers=headers)
+    assert response.status_code == 404
+
+    # Attachments are deleted with their note
+    client.post(
+        f"/note/{note_id}/attachment",
+        params={"filename": "data.txt"},
+        content=b"0123456789",
+        headers=headers,
+    )
+    client.delete(f"/note/{note_id}", headers=headers)
+    assert attachment_test_db.data == {}
+
+
+def test_attachment_is_removed_when_note_is_deleted_during_upload():
+    user_test_db = UserTestDBClient()
+    note_test_db = NoteTestBClient()
+    attachment_test_db = AttachmentTestDBClient()
+    app.dependency_overrides[get_user_db_client] = lambda: user_test_db
+    app.dependency_overrides[get_note_db_client] = lambda: note_test_db
+    app.dependency_overrides[get_attachment_db_client] = lambda: attachment_test_db
+
+    register_response = client.post(
+        "/auth/register",
+        data={"username": "test@email.com", "password": "password"},
+    )
+    headers = {"Authorization": f"Bearer {register_response.json()['access_token']}"}
+    client.post("/note", json=NOTE_JSON, headers=headers)
+    note_id = client.get("/note", headers=headers).json()[0]["id"]
+
+    # Delete the note while the attachment is being uploaded
+    def upload():
+        yield b"01234"
+        note_test_db.data.clear()
+        yield b"56789"
+
+    response = client.post(
+        f"/note/{note_id}/attachment",
+        params={"filename": "data.txt"},
+        content=upload(),
+        headers=headers,
+    )
+    assert response.status_code == 404
+    assert attachment_test_db.data == {}
+
+
+def test_delete_missing_attachment(mocker):
+    bucket = mocker.patch("app.internal.attachment_db_client.GridFSBucket").return_value
+    bucket.delete.side_effect = NoFile
+    mocker.patch("app.internal.attachment_db_client.MongoClient")
+
+    AttachmentGridFSClient().delete_attachment(attachment_id=uuid4())
+
+
+def test_delete_note_with_missing_attachment():
+    user_test_db = UserTestDBClient()
+    note_test_db = NoteTestBClient()
+    attachment_test_db = AttachmentTestDBClient()
+    app.dependency_overrides[get_user_db_client] = lambda: user_test_db
+    app.dependency_overrides[get_note_db_client] = lambda: note_test_db
+    app.dependency_overrides[get_attachment_db_client] = lambda: attachment_test_db
+
+    register_response = client.post(
+        "/auth/register",
+        data={"username": "test@email.com", "password": "password"},
+    )
+    headers = {"Authorization": f"Bearer {register_response.json()['access_token']}"}
+    client.post("/note", json=NOTE_JSON, headers=headers)
+    note_id = client.get("/note", headers=headers).json()[0]["id"]
+    client.post(
+        f"/note/{note_id}/attachment",
+        params={"filename": "data.txt"},
+        content=b"0123456789",
+        headers=headers,
+    )
+
+    # The note can be deleted although the attachment file is already gone
+    attachment_test_db.data.clear()
+    response = client.delete(f"/note/{note_id}", headers=headers)
+    assert response.status_code == 200
+    assert client.get("/note", headers=headers).json() == []
+
+
+def test_attachments_are_kept_when_note_delete_fails():
+    user_test_db = UserTestDBClient()
+    note_test_db = NoteTestBClient()
+    attachment_test_db = AttachmentTestDBClient()
+    app.dependency_overrides[get_user_db_client] = lambda: user_test_db
+    app.dependency_overrides[get_note_db_client] = lambda: note_test_db
+    app.dependency_overrides[get_attachment_db_client] = lambda: attachment_test_db
+
+    register_response = client.post(
+        "/auth/register",
+        data={"username": "test@email.com", "password": "password"},
+    )
+    headers = {"Authorization": f"Bearer {register_response.json()['access_token']}"}
+    client.post("/note", json=NOTE_JSON, headers=headers)
+    note_id = client.get("/note", headers=headers).json()[0]["id"]
+    client.post(
+        f"/note/{note_id}/attachment",
+        params={"filename": "data.txt"},
+        content=b"0123456789",
+        headers=headers,
+    )
+
+    # The note still references existing files after its delete failed
+    def delete_note(user_id, note_id):
+        raise ConnectionError()
+
+    note_test_db.delete_note = delete_note
+    with pytest.raises(ConnectionError):
+        client.delete(f"/note/{note_id}", headers=headers)
+    assert len(client.get(f"/note/{note_id}", headers=headers).json()["attachments"]) == 1
+    assert len(attachment_test_db.data) == 1
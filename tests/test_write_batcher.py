@@ -0,0 +1,154 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from app.config import settings
+from app.dependencies import get_note_db_client, get_user_db_client
+from app.internal.note_db_client import NoteBatchingMongoDBClient, NoteModel, NoteMongoDBClient
+from app.internal.write_batcher import WriteBatcher
+from app.main import app
+from tests.db_client_mock import UserTestDBClient
+
+NOTE_JSON = {"title": "Title", "content": "Note content"}
+
+
+class CollectionTestClient:
+    def __init__(self):
+        self.batches: list[list[InsertOne | UpdateOne]] = []
+        self.write_errors: dict[int, int] = {}
+        self.error: BaseException | None = None
+
+    def bulk_write(self, requests: list[InsertOne | UpdateOne], ordered: bool):
+        self.batches.append(requests)
+        if self.error is not None:
+            raise self.error
+        if write_errors := [
+            {"index": index, "code": code, "errmsg": "Write failed"}
+            for index, code in self.write_errors.items()
+            if index < len(requests)
+        ]:
+            raise BulkWriteError({"writeErrors": write_errors})
+
+
+def test_concurrent_writes_are_batched(caplog):
+    caplog.set_level(logging.INFO, logger="app.internal.write_batcher")
+    collection = CollectionTestClient()
+    write_batcher = WriteBatcher(
+        collection, max_batch_size=5, max_latency_seconds=5, metrics_log_interval=2
+    )
+
+    # Full batches are flushed without waiting for the latency limit.
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        futures = [executor.submit(write_batcher.write, InsertOne({"i": i})) for i in range(10)]
+        assert [future.result(timeout=4) for future in futures] == [None] * 10
+
+    # The write after the full batches is flushed alone once the latency limit is reached.
+    write_batcher.max_latency_seconds = 0.01
+    write_batcher.write(InsertOne({"i": 10}))
+
+    assert [len(batch) for batch in collection.batches] == [5, 5, 1]
+    assert write_batcher.metrics.batch_count == 3
+    assert write_batcher.metrics.operation_count == 11
+    assert write_batcher.metrics.full_batch_count == 2
+    assert write_batcher.metrics.average_batch_fill(max_batch_size=5) == pytest.approx(11 / 15)
+    assert "Write batches: 2, operations: 10, full batches: 2" in caplog.text
+
+
+def test_write_errors_are_returned_to_their_callers():
+    collection = CollectionTestClient()
+    collection.write_errors = {1: 11000}
+    write_batcher = WriteBatcher(collection, max_batch_size=2, max_latency_seconds=5)
+
+    operations = [InsertOne({"i": 0}), InsertOne({"i": 1})]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(write_batcher.write, operation) for operation in operations]
+        for future in futures:
+            future.exception(timeout=4)
+
+    # Only the caller whose write failed gets the error.
+    assert [len(batch) for batch in collection.batches] == [2]
+    failed_index = operations.index(collection.batches[0][1])
+    assert futures[1 - failed_index].result() is None
+    with pytest.raises(DuplicateKeyError):
+        futures[failed_index].result()
+
+
+@pytest.mark.parametrize(
+    "error", [BulkWriteError({"writeErrors": [{"code": 1}]}), KeyboardInterrupt()]
+)
+def test_failed_flush_does_not_stop_batching(error):
+    collection = CollectionTestClient()
+    write_batcher = WriteBatcher(collection, max_batch_size=1, max_latency_seconds=0)
+
+    collection.error = error
+    with pytest.raises(type(error)):
+        write_batcher.write(InsertOne({"i": 0}))
+
+    collection.error = None
+    assert write_batcher.write(InsertOne({"i": 1})) is None
+    assert len(collection.batches) == 2
+
+
+def test_batched_writes_match_note_mongo_db_client(mocker):
+    collection = MagicMock()
+    mongo_client = mocker.patch("app.internal.note_db_client.MongoClient")
+    mongo_client.return_value.get_database.return_value.get_collection.return_value = collection
+
+    note = NoteModel(
+        id=uuid4(),
+        user_id=uuid4(),
+        title="Title",
+        content="Note content",
+        last_updated=datetime.now(timezone.utc),
+    )
+    note_db_client = NoteMongoDBClient()
+    batching_db_client = NoteBatchingMongoDBClient(max_batch_size=1, max_latency_ms=0)
+
+    note_db_client.save_note(note)
+    batching_db_client.save_note(note)
+    assert collection.bulk_write.call_args[0][0] == [
+        InsertOne(*collection.insert_one.call_args[0], **collection.insert_one.call_args[1])
+    ]
+
+    note_db_client.update_note(user_id=note.user_id, note_id=note.id, note=note)
+    batching_db_client.update_note(user_id=note.user_id, note_id=note.id, note=note)
+    assert collection.bulk_write.call_args[0][0] == [
+        UpdateOne(*collection.update_one.call_args[0], **collection.update_one.call_args[1])
+    ]
+
+
+def test_batched_writes_through_routes(mocker, monkeypatch):
+    collection = CollectionTestClient()
+    mongo_client = mocker.patch("app.internal.note_db_client.MongoClient")
+    mongo_client.return_value.get_database.return_value.get_collection.return_value = collection
+
+    # A batch larger than the default threadpool of 40 threads can still be filled.
+    monkeypatch.setattr(settings, "NOTE_WRITE_BATCHING_ENABLED", True)
+    batching_db_client = NoteBatchingMongoDBClient(max_batch_size=50, max_latency_ms=5000)
+    user_test_db = UserTestDBClient()
+    app.dependency_overrides[get_user_db_client] = lambda: user_test_db
+    app.dependency_overrides[get_note_db_client] = lambda: batching_db_client
+
+    with TestClient(app) as client:
+        register_response = client.post(
+            "/auth/register",
+            data={"username": "test@email.com", "password": "password"},
+        )
+        headers = {"Authorization": f"Bearer {register_response.json()['access_token']}"}
+
+        with ThreadPoolExecutor(max_workers=50) as executor:
+            futures = [
+                executor.submit(client.post, "/note", json=NOTE_JSON, headers=headers)
+                for _ in range(50)
+            ]
+            assert [future.result(timeout=4).status_code for future in futures] == [200] * 50
+
+    assert [len(batch) for batch in collection.batches] == [50]
+    assert all(isinstance(operation, InsertOne) for operation in collection.batches[0])